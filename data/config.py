@@ -10,8 +10,63 @@ LOG_LEVEL = "INFO"
 
 REF_LINK = "avo5rj"  # Your ref id https://t.me/pengu_clash_bot?start=invite-######
 
+# skip accounts whose last result in output/accounts_data.json is final with all tasks done,
+# and run the rest by priority: pending claims, not-joined, incomplete tasks
+SKIP_DONE_ACCOUNTS = True
+
 # session folder (do not change)
 WORKDIR = "sessions/"
 
-# timeout in seconds for checking accounts on valid
-TIMEOUT = 30
+# where auth keys live: 'files' - one pyrogram .session file per account in WORKDIR,
+# 'sqlite' - all accounts in the single SESSION_DB file (fill it with menu action 4)
+SESSION_BACKEND = 'files'
+SESSION_DB = "sessions/sessions.db"
+
+# max file descriptors held by Telegram clients and HTTP sessions at once (None = open-files limit minus a reserve)
+FD_BUDGET = None
+
+# timeouts in seconds for every stage of an account run
+TIMEOUTS = {
+    'TELEGRAM_CONNECT': 30,  # connecting to Telegram
+    'TELEGRAM_REQUEST': 20,  # each Telegram call (send_message, resolve_peer, RequestWebView, get_me)
+    'HTTP_CONNECT': 10,  # establishing a connection to the API (through the proxy)
+    'HTTP_REQUEST': 30,  # each API request, from connect to the end of the response body
+    'ACCOUNT': 300,  # overall deadline for one account from its admission, including the start delay
+}
+
+# adaptive in-flight limits per upstream (telegram, api.elympics.cc, api.pudgy-clash.elympics.ai):
+# +1 after every WINDOW requests with p95 latency and error rate under target, *DECREASE on 429/5xx/timeouts
+CONCURRENCY = {
+    'ACCOUNTS': 100,  # accounts run at once (capped by FD_BUDGET); TIMEOUTS['ACCOUNT'] starts on admission
+    'INITIAL': 10,
+    'MIN': 1,
+    'MAX': 200,
+    'TARGET_P95': {  # seconds
+        'telegram': 5,
+        'api.elympics.cc': 3,
+        'api.pudgy-clash.elympics.ai': 3,
+    },
+    'TARGET_ERROR_RATE': 0.05,
+    'DECREASE': 0.5,
+    'WINDOW': 20,
+}
+
+# several hosts sharing one account list: each node claims batches of accounts from a SQLite file on
+# shared storage, keeps its leases alive with heartbeats and picks up the leases of dead nodes;
+# every account runs once per cycle
+COORDINATION = {
+    'ENABLED': False,
+    'DB': "shared/leases.db",  # must be on storage every node can reach
+    'NODE_ID': None,  # None = hostname-pid
+    'CYCLE_HOURS': 24,
+    'BATCH': 50,  # max accounts claimed at a time; free slots are refilled as accounts finish
+    'LEASE': 300,  # seconds a claim lives without a heartbeat
+    'HEARTBEAT': 60,  # seconds between heartbeats, keep well under LEASE
+}
+
+# settings for `python main.py --profile`, in seconds
+PROFILE = {
+    'SLOW_CALLBACK': 0.1,  # asyncio reports callbacks that block the loop longer than this
+    'LAG_INTERVAL': 0.5,  # how often the loop lag is sampled
+    'LAG_WARNING': 0.1,  # log a warning when the loop wakes up later than this
+}
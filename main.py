@@ -1,14 +1,23 @@
 from utils.core.telegram import Accounts
+from utils.core import fd_budget, limiters_summary, import_session_files, export_session_files
 from utils.starter import start
+from utils.report import build_report
+from utils.profiler import Profiler
+from utils.planner import plan_accounts
+from utils.coordinator import run_coordinated
+from data import config
 import asyncio
 import os
+import sys
 
 
-async def main():
+def select_action():
     print('PENGU CLASH')
     print("Soft's author: https://t.me/botpr0d\n")
-    action = int(input("Select action:\n1. Start soft\n2. Create sessions\n\n> "))
+    return int(input("Select action:\n1. Start soft\n2. Create sessions\n3. Build report\n4. Import .session files into session store\n5. Export session store to .session files\n\n> "))
 
+
+async def main(action: int):
     if not os.path.exists('sessions'): os.mkdir('sessions')
     if not os.path.exists('sessions/accounts.json'):
         with open("sessions/accounts.json", 'w') as f:
@@ -17,16 +26,43 @@ async def main():
     if action == 2:
         await Accounts().create_sessions()
 
-    if action == 1:
-        accounts = await Accounts().get_accounts()
+    if action == 3:
+        build_report()
+
+    if action == 4:
+        await import_session_files()
+
+    if action == 5:
+        await export_session_files()
+
+    if action == 1 and config.COORDINATION['ENABLED']:
+        await run_coordinated(Accounts(), planner=plan_accounts if config.SKIP_DONE_ACCOUNTS else None)
+        fd_budget.summary()
+        limiters_summary()
+
+    elif action == 1:
+        accounts = await Accounts().get_accounts(planner=plan_accounts if config.SKIP_DONE_ACCOUNTS else None)
         tasks = []
         for thread, account in enumerate(accounts):
             session_name, user_agent, proxy = account.values()
             tasks.append(asyncio.create_task(
-                start(session_name=session_name, user_agent=user_agent, thread=thread, proxy=proxy)))
+                start(session_name=session_name, user_agent=user_agent, thread=thread, proxy=proxy),
+                name=session_name))
 
         await asyncio.gather(*tasks)
+        fd_budget.summary()
+        limiters_summary()
 
 
 if __name__ == '__main__':
-    asyncio.get_event_loop().run_until_complete(main())
+    # Ask before the profiler starts, so time spent at the prompt is not reported as loop lag
+    action = select_action()
+    loop = asyncio.get_event_loop()
+    profiler = Profiler() if '--profile' in sys.argv else None
+    if profiler:
+        profiler.start(loop)
+    try:
+        loop.run_until_complete(main(action))
+    finally:
+        if profiler:
+            profiler.stop(loop)
@@ -0,0 +1,194 @@
+import asyncio
+import os
+import socket
+import sqlite3
+import threading
+import time
+from data import config
+from utils.core import logger, account_slots
+from utils.starter import start
+
+
+def current_cycle():
+    """Cycles are fixed wall-clock periods, so every node derives the same id without talking to the others."""
+    return str(int(time.time() // (config.COORDINATION['CYCLE_HOURS'] * 3600)))
+
+
+class LeaseStore:
+    """Account leases in a SQLite file on shared storage.
+
+    An account is claimed by one node for LEASE seconds and kept alive by heartbeats; when a node
+    dies its leases expire and other nodes claim them. Finished accounts are marked done, so each
+    account runs once per cycle; interrupted ones are released for any node to claim again.
+    Accounts are claimed in the order they were seeded (the planner's order).
+    """
+
+    def __init__(self, path: str, node: str, cycle: str):
+        self.path = path
+        self.node = node
+        self.cycle = cycle
+        # Calls arrive from worker threads via asyncio.to_thread and share one connection
+        self.lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        # WAL needs shared memory and does not work on network file systems
+        self.connection = sqlite3.connect(path, timeout=60, isolation_level=None, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=DELETE")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS leases ("
+            "cycle TEXT NOT NULL, account TEXT NOT NULL, owner TEXT, expires_at REAL NOT NULL DEFAULT 0, "
+            "done INTEGER NOT NULL DEFAULT 0, priority INTEGER NOT NULL DEFAULT 0, PRIMARY KEY (cycle, account))")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS leases_pending ON leases (cycle, done, expires_at)")
+
+    def seed(self, accounts: list):
+        """Register this node's accounts for the cycle; only they are claimed and waited for by this node."""
+        with self.lock:
+            self.connection.execute("CREATE TEMP TABLE IF NOT EXISTS local (account TEXT PRIMARY KEY)")
+            self.connection.executemany("INSERT OR IGNORE INTO temp.local VALUES (?)",
+                                        [(account,) for account in accounts])
+            self.connection.execute("BEGIN IMMEDIATE")
+            try:
+                # The latest seed's order wins, so a restarted node claims by its current plan
+                self.connection.executemany(
+                    "INSERT INTO leases (cycle, account, priority) VALUES (?, ?, ?) "
+                    "ON CONFLICT (cycle, account) DO UPDATE SET priority = excluded.priority",
+                    [(self.cycle, account, priority) for priority, account in enumerate(accounts)])
+                self.connection.execute("COMMIT")
+            except BaseException:
+                self.connection.execute("ROLLBACK")
+                raise
+
+    def claim(self, batch: int):
+        """Take up to batch accounts that are not done and not leased by a live node."""
+        with self.lock:
+            now = time.time()
+            self.connection.execute("BEGIN IMMEDIATE")
+            try:
+                accounts = [row[0] for row in self.connection.execute(
+                    "SELECT account FROM leases WHERE cycle = ? AND done = 0 AND expires_at < ? "
+                    "AND account IN (SELECT account FROM temp.local) ORDER BY priority LIMIT ?",
+                    (self.cycle, now, batch))]
+                self.connection.executemany(
+                    "UPDATE leases SET owner = ?, expires_at = ? WHERE cycle = ? AND account = ?",
+                    [(self.node, now + config.COORDINATION['LEASE'], self.cycle, account) for account in accounts])
+                self.connection.execute("COMMIT")
+            except BaseException:
+                self.connection.execute("ROLLBACK")
+                raise
+            return accounts
+
+    def heartbeat(self):
+        with self.lock:
+            self.connection.execute(
+                "UPDATE leases SET expires_at = ? WHERE cycle = ? AND owner = ? AND done = 0",
+                (time.time() + config.COORDINATION['LEASE'], self.cycle, self.node))
+
+    def complete(self, account: str):
+        with self.lock:
+            self.connection.execute(
+                "UPDATE leases SET done = 1 WHERE cycle = ? AND account = ? AND owner = ?",
+                (self.cycle, account, self.node))
+
+    def release(self, account: str, delay: float = 0):
+        """Give up an unfinished account so any node can claim it again after delay seconds."""
+        with self.lock:
+            self.connection.execute(
+                "UPDATE leases SET owner = NULL, expires_at = ? WHERE cycle = ? AND account = ? AND owner = ? "
+                "AND done = 0",
+                (time.time() + delay if delay else 0, self.cycle, account, self.node))
+
+    def remaining(self):
+        with self.lock:
+            return self.connection.execute(
+                "SELECT COUNT(*) FROM leases WHERE cycle = ? AND done = 0 AND account IN (SELECT account FROM temp.local)",
+                (self.cycle,)).fetchone()[0]
+
+    def close(self):
+        # Waits for a heartbeat still running in a worker thread after keep_alive was cancelled
+        with self.lock:
+            self.connection.close()
+
+
+async def keep_alive(store: LeaseStore):
+    while True:
+        await asyncio.sleep(config.COORDINATION['HEARTBEAT'])
+        try:
+            await asyncio.to_thread(store.heartbeat)
+        except sqlite3.Error as e:
+            logger.warning(f"Lease heartbeat failed: {e}")
+
+
+async def run_account(store: LeaseStore, thread: int, account: dict):
+    try:
+        await start(session_name=account['session_name'], user_agent=account['user_agent'], thread=thread,
+                    proxy=account['proxy'])
+    except BaseException as e:
+        # Not done: hand the lease back instead of waiting for it to expire. A run that failed is
+        # retried after a heartbeat, so an account that always fails is not reclaimed in a tight loop
+        delay = 0 if isinstance(e, asyncio.CancelledError) else config.COORDINATION['HEARTBEAT']
+        try:
+            await asyncio.to_thread(store.release, account['session_name'], delay)
+        except sqlite3.Error as error:
+            logger.warning(f"{account['session_name']} | Lease release failed, it expires instead: {error}")
+        raise
+    await asyncio.to_thread(store.complete, account['session_name'])
+
+
+async def run_coordinated(accounts_manager, planner=None):
+    """Keep up to account_slots() accounts from the shared lease store running until the cycle is done."""
+    sessions = accounts_manager.parse_sessions()
+    available = accounts_manager.get_available_accounts(sessions)
+    if planner is not None and available:
+        available = planner(available)
+    if not available:
+        logger.warning("No available accounts found")
+        return
+    by_name = {account['session_name']: account for account in available}
+
+    node = config.COORDINATION['NODE_ID'] or f"{socket.gethostname()}-{os.getpid()}"
+    store = LeaseStore(config.COORDINATION['DB'], node, current_cycle())
+    await asyncio.to_thread(store.seed, list(by_name))
+    logger.info(f"Node {node} joined cycle {store.cycle} with {len(by_name)} account(s)")
+
+    heartbeat = asyncio.create_task(keep_alive(store))
+    slots = account_slots()
+    running = set()
+    thread = 0
+    try:
+        while True:
+            claimed = []
+            if len(running) < slots:
+                claimed = await asyncio.to_thread(store.claim,
+                                                  min(slots - len(running), config.COORDINATION['BATCH']))
+            if claimed:
+                batch = [by_name[name] for name in claimed]
+                logger.info(f"Node {node} claimed {len(batch)} account(s)")
+                valid, invalid = await accounts_manager.check_valid_accounts(batch)
+                for account in invalid:
+                    await asyncio.to_thread(store.complete, account['session_name'])
+
+                for account in valid:
+                    running.add(asyncio.create_task(run_account(store, thread, account),
+                                                    name=account['session_name']))
+                    thread += 1
+                continue
+
+            if not running:
+                if not await asyncio.to_thread(store.remaining):
+                    break
+                await asyncio.sleep(config.COORDINATION['HEARTBEAT'])
+                continue
+
+            # Claim again as soon as a slot frees up; wake up anyway to pick up leases of dead nodes
+            done, running = await asyncio.wait(running, timeout=config.COORDINATION['HEARTBEAT'],
+                                               return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                # One failed account must not stop the node; its lease was released or expires
+                if not task.cancelled() and task.exception() is not None:
+                    logger.error(f"Node {node} | {task.get_name()} | Account run failed: {task.exception()}")
+    finally:
+        for task in running:
+            task.cancel()
+        await asyncio.gather(*running, return_exceptions=True)
+        heartbeat.cancel()
+        store.close()
+    logger.success(f"Node {node} finished cycle {store.cycle}")
@@ -1,2 +1,5 @@
 from .logger import logger
-from .file_manager import get_all_lines, load_from_json, save_to_json, save_list_to_file
+from .resources import fd_budget, account_slots, admission
+from .limiter import limiters, limiters_summary
+from .session_store import get_session_store, session_kwargs, import_session_files, export_session_files
+from .file_manager import get_all_lines, load_from_json, save_to_json, save_list_to_file, append_to_csv
@@ -1,4 +1,6 @@
+import csv
 import json
+import os
 
 
 def get_all_lines(filepath: str):
@@ -28,4 +30,13 @@ def save_to_json(path: str, dict_):
 def save_list_to_file(filepath: str, list_: list):
     with open(filepath, mode="w", encoding="utf-8") as file:
         for item in list_:
-            file.write(f"{item['session_name']}.session\n")
\ No newline at end of file
+            file.write(f"{item['session_name']}.session\n")
+
+def append_to_csv(path: str, row: dict):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    new_file = not os.path.exists(path)
+    with open(path, mode='a', encoding='utf-8', newline='') as file:
+        writer = csv.DictWriter(file, fieldnames=list(row))
+        if new_file:
+            writer.writeheader()
+        writer.writerow(row)
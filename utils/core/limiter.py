@@ -0,0 +1,118 @@
+import asyncio
+import time
+from collections import deque
+from pyrogram.errors import FloodWait
+from data import config
+from .logger import logger
+
+
+class AdaptiveLimiter:
+    """AIMD in-flight limit for one upstream.
+
+    The limit grows by one after every window of requests whose p95 latency and error rate stay
+    under target, and is multiplied by DECREASE on overload (429/5xx, timeouts, FloodWait).
+    After a decrease further overload signals are ignored until the requests in flight at that
+    moment have finished, so one burst of failures only halves the limit once.
+    """
+
+    def __init__(self, name: str, target_p95: float, overload_errors: tuple = (asyncio.TimeoutError,)):
+        self.name = name
+        self.target_p95 = target_p95
+        self.overload_errors = overload_errors
+        self.limit = config.CONCURRENCY['INITIAL']
+        self.in_flight = 0
+        self.peak_limit = self.limit
+        self.window = deque(maxlen=config.CONCURRENCY['WINDOW'])
+        self.recovery = 0
+        self._condition = None
+
+    @property
+    def condition(self):
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        return self._condition
+
+    async def acquire(self):
+        async with self.condition:
+            await self.condition.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+
+    async def release(self, latency: float, error: bool, overload: bool):
+        async with self.condition:
+            self.in_flight -= 1
+            self.record(latency, error, overload)
+            self.condition.notify_all()
+
+    def slot(self):
+        return Slot(self)
+
+    def record(self, latency: float, error: bool, overload: bool):
+        if self.recovery:
+            # Started before the decrease: they reflect the old limit, so they neither cut it again
+            # nor count in the next window
+            self.recovery -= 1
+            return
+        if overload:
+            self.decrease()
+            return
+
+        self.window.append((latency, error))
+        if len(self.window) < self.window.maxlen:
+            return
+
+        latencies = sorted(latency for latency, _ in self.window)
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        error_rate = sum(error for _, error in self.window) / len(self.window)
+        self.window.clear()
+        if error_rate > config.CONCURRENCY['TARGET_ERROR_RATE']:
+            self.decrease()
+        elif p95 <= self.target_p95 and self.limit < config.CONCURRENCY['MAX']:
+            self.limit += 1
+            self.peak_limit = max(self.peak_limit, self.limit)
+            logger.debug(f"{self.name} | p95 {p95:.2f}s, errors {error_rate:.0%} | limit raised to {self.limit}")
+
+    def decrease(self):
+        self.limit = max(config.CONCURRENCY['MIN'], int(self.limit * config.CONCURRENCY['DECREASE']))
+        self.recovery = self.in_flight
+        self.window.clear()
+        logger.info(f"{self.name} | Overload detected, limit cut to {self.limit}")
+
+
+class Slot:
+    """One in-flight request; only 429/5xx passed to status() and overload_errors count as errors."""
+
+    def __init__(self, limiter: AdaptiveLimiter):
+        self.limiter = limiter
+        self.started = None
+        self.error = False
+        self.is_overload = False
+
+    def status(self, status: int):
+        if status == 429 or status >= 500:
+            self.error = self.is_overload = True
+
+    async def __aenter__(self):
+        await self.limiter.acquire()
+        self.started = time.monotonic()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        # Other exceptions (RPC errors, bad responses, bugs) say nothing about the upstream's load
+        if exc_type is not None and issubclass(exc_type, self.limiter.overload_errors):
+            self.error = self.is_overload = True
+        await self.limiter.release(time.monotonic() - self.started, self.error, self.is_overload)
+        return False
+
+
+limiters = {
+    'telegram': AdaptiveLimiter('telegram', config.CONCURRENCY['TARGET_P95']['telegram'],
+                                (asyncio.TimeoutError, FloodWait)),
+    'api.elympics.cc': AdaptiveLimiter('api.elympics.cc', config.CONCURRENCY['TARGET_P95']['api.elympics.cc']),
+    'api.pudgy-clash.elympics.ai': AdaptiveLimiter('api.pudgy-clash.elympics.ai',
+                                                   config.CONCURRENCY['TARGET_P95']['api.pudgy-clash.elympics.ai']),
+}
+
+
+def limiters_summary():
+    for limiter in limiters.values():
+        logger.info(f"{limiter.name} | final limit {limiter.limit}, peak {limiter.peak_limit}")
@@ -3,6 +3,9 @@ import re
 from loguru import logger
 from data import config
 
+FORMAT_INFO = "<green>{time:HH:mm:ss.SS}</green> | <blue>{level}</blue> | <level>{message}</level>"
+FORMAT_ERROR = "<green>{time:HH:mm:ss.SS}</green> | <blue>{level}</blue> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> | <level>{message}</level>"
+
 
 def formatter(record, format_string):
     return format_string + record["extra"].get("end", "\n") + "{exception}"
@@ -12,15 +15,17 @@ def clean_brackets(raw_str):
     return re.sub(r'<.*?>', '', raw_str)
 
 
+# Computed once instead of on every record written to the file sink
+FORMAT_FILE = clean_brackets(FORMAT_ERROR)
+
+
 def logging_setup():
-    format_info = "<green>{time:HH:mm:ss.SS}</green> | <blue>{level}</blue> | <level>{message}</level>"
-    format_error = "<green>{time:HH:mm:ss.SS}</green> | <blue>{level}</blue> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> | <level>{message}</level>"
     logger_path = r"logs/out.log"
 
     logger.remove()
 
-    logger.add(logger_path, colorize=True, format=lambda record: formatter(record, clean_brackets(format_error)))
-    logger.add(sys.stdout, colorize=True, format=lambda record: formatter(record, format_info), level=config.LOG_LEVEL)
+    logger.add(logger_path, colorize=True, format=lambda record: formatter(record, FORMAT_FILE))
+    logger.add(sys.stdout, colorize=True, format=lambda record: formatter(record, FORMAT_INFO), level=config.LOG_LEVEL)
 
 
 logging_setup()
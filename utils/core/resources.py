@@ -0,0 +1,110 @@
+import asyncio
+from collections import Counter, deque
+from data import config
+from .logger import logger
+
+# File descriptors one resource holds: a Telegram client has its .session file and a socket,
+# an HTTP session keeps one connection for its sequential requests
+WEIGHTS = {
+    'telegram': 2,
+    'http': 1,
+}
+
+# Left for logs, output files and the interpreter itself
+RESERVED_FDS = 64
+
+
+def default_budget():
+    """Derive the budget from the soft open-files limit where the platform exposes it."""
+    try:
+        import resource
+        soft, _ = resource.getrlimit(resource.RLIMIT_NOFILE)
+    except (ImportError, ValueError, OSError):
+        return 512
+    if soft == resource.RLIM_INFINITY:
+        return 4096
+    return max(soft - RESERVED_FDS, max(WEIGHTS.values()))
+
+
+class FdBudget:
+    """Caps file descriptors held by Telegram clients and HTTP sessions and counts what is not released."""
+
+    def __init__(self, limit: int = None):
+        self.limit = limit or default_budget()
+        self.in_use = 0
+        self.peak = 0
+        self.opened = Counter()
+        self.closed = Counter()
+        # (kind, future) in arrival order; a release wakes only the waiters that now fit
+        self.waiters = deque()
+
+    def take(self, kind: str):
+        self.in_use += WEIGHTS[kind]
+        self.peak = max(self.peak, self.in_use)
+        self.opened[kind] += 1
+
+    def wake(self):
+        while self.waiters:
+            kind, waiter = self.waiters[0]
+            if waiter.done():
+                self.waiters.popleft()
+                continue
+            if self.in_use + WEIGHTS[kind] > self.limit:
+                return
+            self.waiters.popleft()
+            self.take(kind)
+            waiter.set_result(None)
+
+    async def acquire(self, kind: str):
+        if not self.waiters and self.in_use + WEIGHTS[kind] <= self.limit:
+            self.take(kind)
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self.waiters.append((kind, waiter))
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Granted just before the cancellation: give it back unused
+                self.in_use -= WEIGHTS[kind]
+                self.opened[kind] -= 1
+            # Waiters queued behind this one may fit now
+            self.wake()
+            raise
+
+    async def release(self, kind: str):
+        self.in_use -= WEIGHTS[kind]
+        self.closed[kind] += 1
+        self.wake()
+
+    def summary(self):
+        """Log peak usage and any resources that were opened but never released."""
+        logger.info(f"File descriptor budget: peak {self.peak}/{self.limit}")
+        for kind in WEIGHTS:
+            leaked = self.opened[kind] - self.closed[kind]
+            message = f"{kind}: opened {self.opened[kind]}, released {self.closed[kind]}, leaked {leaked}"
+            if leaked:
+                logger.warning(message)
+            else:
+                logger.info(message)
+
+
+fd_budget = FdBudget(config.FD_BUDGET)
+
+_admission = None
+
+
+def account_slots():
+    """Accounts run or checked at once, capped so admitted accounts never wait for the fd budget.
+
+    An account holds either its Telegram client or its HTTP session, never both.
+    """
+    return max(1, min(config.CONCURRENCY['ACCOUNTS'], fd_budget.limit // max(WEIGHTS.values())))
+
+
+def admission():
+    # Created on first use so it binds to the running loop
+    global _admission
+    if _admission is None:
+        _admission = asyncio.Semaphore(account_slots())
+    return _admission
@@ -0,0 +1,107 @@
+import os
+import sqlite3
+from pathlib import Path
+from pyrogram.storage import FileStorage, MemoryStorage
+from data import config
+from .logger import logger
+
+
+class SessionStore:
+    """All session strings in one indexed SQLite file instead of one .session file per account."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS sessions (name TEXT PRIMARY KEY, session_string TEXT NOT NULL)")
+        self.connection.commit()
+
+    def names(self):
+        return [row[0] for row in self.connection.execute("SELECT name FROM sessions ORDER BY name")]
+
+    def get(self, name: str):
+        row = self.connection.execute("SELECT session_string FROM sessions WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def put(self, name: str, session_string: str):
+        with self.connection:
+            self.connection.execute(
+                "INSERT INTO sessions (name, session_string) VALUES (?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET session_string = excluded.session_string",
+                (name, session_string))
+
+    def close(self):
+        self.connection.close()
+
+
+_store = None
+
+
+def get_session_store():
+    global _store
+    if _store is None:
+        _store = SessionStore(config.SESSION_DB)
+    return _store
+
+
+def session_kwargs(session_name: str):
+    """Client keyword arguments for the configured session backend."""
+    if config.SESSION_BACKEND == 'sqlite':
+        return {"session_string": get_session_store().get(session_name), "in_memory": True}
+    return {"workdir": config.WORKDIR}
+
+
+async def import_session_files(workdir: str = config.WORKDIR):
+    """Copy every <name>.session file in workdir into the session store."""
+    store = get_session_store()
+    imported = 0
+    for file in os.listdir(workdir):
+        if not file.endswith(".session"):
+            continue
+        name = file[:-len(".session")]
+        storage = FileStorage(name, Path(workdir))
+        try:
+            await storage.open()
+            store.put(name, await storage.export_session_string())
+            imported += 1
+        except Exception as ex:
+            logger.error(f"Failed to import {file}: {ex}")
+        finally:
+            await storage.close()
+
+    logger.success(f"Imported {imported} session(s) into {store.path}")
+    return imported
+
+
+async def export_session_files(workdir: str = config.WORKDIR):
+    """Write every session of the store back to <name>.session files in workdir."""
+    store = get_session_store()
+    exported = 0
+    for name in store.names():
+        if os.path.exists(os.path.join(workdir, f"{name}.session")):
+            logger.warning(f"{name}.session already exists, skipping")
+            continue
+
+        memory = MemoryStorage(name, store.get(name))
+        storage = FileStorage(name, Path(workdir))
+        try:
+            await memory.open()
+            await storage.open()
+            await storage.dc_id(await memory.dc_id())
+            await storage.api_id(await memory.api_id())
+            await storage.test_mode(await memory.test_mode())
+            await storage.auth_key(await memory.auth_key())
+            await storage.user_id(await memory.user_id())
+            await storage.is_bot(await memory.is_bot())
+            await storage.date(0)
+            await storage.save()
+            exported += 1
+        except Exception as ex:
+            logger.error(f"Failed to export {name}: {ex}")
+        finally:
+            await memory.close()
+            await storage.close()
+
+    logger.success(f"Exported {exported} session(s) to {workdir}")
+    return exported
@@ -3,7 +3,8 @@ import os
 import urllib.parse
 from pyrogram import Client
 from data import config
-from utils.core import logger, load_from_json, save_list_to_file, save_to_json, agents
+from utils.core import logger, load_from_json, save_list_to_file, save_to_json, agents, fd_budget, \
+    get_session_store, session_kwargs, admission
 
 
 def parse_proxy(proxy_str):
@@ -26,6 +27,25 @@ def parse_proxy(proxy_str):
         return None
 
 
+async def release_client(client: Client):
+    """Close a client's session and storage, also when connect() timed out half-way.
+
+    connect() opens the storage and starts the session before it sets is_connected, so disconnect()
+    alone would skip both. Raises if anything could not be closed.
+    """
+    if client.is_connected:
+        await client.disconnect()
+        return
+    try:
+        if client.session is not None:
+            session, client.session = client.session, None
+            await asyncio.wait_for(session.stop(), timeout=config.TIMEOUTS['TELEGRAM_REQUEST'])
+    finally:
+        if getattr(client.storage, 'conn', None) is not None:
+            await client.storage.close()
+            client.storage.conn = None
+
+
 class Accounts:
     def __init__(self):
         self.workdir = config.WORKDIR
@@ -40,17 +60,19 @@ class Accounts:
             logger.warning("No accounts found in sessions/accounts.json")
             return []
 
-        available_accounts = []
-        for session in sessions:
-            for saved_account in accounts_from_json:
-                if saved_account['session_name'] == session:
-                    available_accounts.append(saved_account)
-                    break
-
-        return available_accounts
+        # The first entry wins when a session name is listed twice
+        by_name = {}
+        for saved_account in accounts_from_json:
+            by_name.setdefault(saved_account['session_name'], saved_account)
+        return [by_name[session] for session in sessions if session in by_name]
 
     def parse_sessions(self):
-        """List all session files in the workdir."""
+        """List all sessions of the configured backend."""
+        if config.SESSION_BACKEND == 'sqlite':
+            sessions = get_session_store().names()
+            logger.info(f"Found {len(sessions)} session(s)")
+            return sessions
+
         sessions = [
             file.replace(".session", "")
             for file in os.listdir(self.workdir)
@@ -72,20 +94,21 @@ class Accounts:
             return None
 
         client = None
+        await fd_budget.acquire('telegram')
         try:
             client = Client(
                 name=session_name,
                 api_id=self.api_id,
                 api_hash=self.api_hash,
-                workdir=self.workdir,
-                proxy=proxy_dict
+                proxy=proxy_dict,
+                **session_kwargs(session_name)
             )
 
             logger.debug(f"Attempting to connect for {session_name}")
-            connected = await asyncio.wait_for(client.connect(), timeout=config.TIMEOUT)
+            connected = await asyncio.wait_for(client.connect(), timeout=config.TIMEOUTS['TELEGRAM_CONNECT'])
             if connected:
                 try:
-                    me = await client.get_me()
+                    me = await asyncio.wait_for(client.get_me(), timeout=config.TIMEOUTS['TELEGRAM_REQUEST'])
                     logger.debug(f"Account {session_name} is valid (User: {me.username or me.phone_number})")
                     return account
                 except Exception as ex:
@@ -102,17 +125,24 @@ class Accounts:
             logger.error(f"Error for {session_name}: {ex}")
             return None
         finally:
-            if client is not None:
-                try:
-                    await client.disconnect()
+            # Released only once closed, so a client that could not be closed shows up as leaked
+            try:
+                if client is not None:
+                    await release_client(client)
                     logger.debug(f"Disconnected client for {session_name}")
-                except Exception as ex:
-                    logger.warning(f"Error during disconnect for {session_name}: {ex}")
+                await fd_budget.release('telegram')
+            except Exception as ex:
+                logger.warning(f"Error during disconnect for {session_name}: {ex}")
+
+    async def check_account_admitted(self, account: dict):
+        # Bounded like account runs, so a large farm does not queue every check on the fd budget at once
+        async with admission():
+            return await self.check_valid_account(account)
 
     async def check_valid_accounts(self, accounts: list):
         """Check validity of multiple accounts concurrently."""
         logger.debug("Checking accounts for validity...")
-        tasks = [self.check_valid_account(account) for account in accounts]
+        tasks = [self.check_account_admitted(account) for account in accounts]
         results = await asyncio.gather(*tasks, return_exceptions=True)
 
         valid_accounts = []
@@ -129,10 +159,12 @@ class Accounts:
         logger.success(f"Valid accounts: {len(valid_accounts)}; Invalid: {len(invalid_accounts)}")
         return valid_accounts, invalid_accounts
 
-    async def get_accounts(self):
-        """Retrieve valid accounts from session files."""
+    async def get_accounts(self, planner=None):
+        """Retrieve valid accounts from session files, optionally filtered and ordered by planner."""
         sessions = self.parse_sessions()
         available_accounts = self.get_available_accounts(sessions)
+        if planner is not None and available_accounts:
+            available_accounts = planner(available_accounts)
 
         if not available_accounts:
             logger.warning("No available accounts found")
@@ -149,6 +181,11 @@ class Accounts:
             logger.warning("No valid accounts found. Consider creating new sessions.")
         return valid_accounts
 
+    def new_session_kwargs(self):
+        if config.SESSION_BACKEND == 'sqlite':
+            return {"in_memory": True}
+        return {"workdir": self.workdir}
+
     async def create_sessions(self):
         """Create new Telegram sessions interactively."""
         while True:
@@ -175,14 +212,16 @@ class Accounts:
                     name=session_name,
                     api_id=self.api_id,
                     api_hash=self.api_hash,
-                    workdir=self.workdir,
                     phone_number=phone_number,
                     proxy=proxy_dict,
-                    lang_code='en'
+                    lang_code='en',
+                    **self.new_session_kwargs()
                 )
 
                 async with client:
                     me = await client.get_me()
+                    if config.SESSION_BACKEND == 'sqlite':
+                        get_session_store().put(session_name, await client.export_session_string())
                     account_data = {
                         "session_name": session_name,
                         "user_agent": user_agent,
@@ -2,67 +2,167 @@ import json
 import random
 import urllib.parse
 import os
-from utils.core import logger
+import time
+from utils.core import logger, fd_budget, session_kwargs, limiters
+from utils.core.telegram import parse_proxy, release_client
 from pyrogram import Client
 from pyrogram.raw.functions.messages import RequestWebView
 import asyncio
+from collections import ChainMap
+from contextlib import asynccontextmanager
+from types import MappingProxyType
 from aiohttp_socks import ProxyConnector
 import aiohttp
 from data import config
 
-
-def parse_proxy(proxy_str):
-    """Parse a proxy string into a Pyrogram-compatible dictionary."""
+# Returned by login() when a stage ran out of its time budget
+TIMEOUT_ERROR = "Timeout"
+
+# Task types process_tasks() can complete; other types never change on their own runs
+COMPLETABLE_TASKS = ('followTwitter', 'followAnnouncementsChannel')
+
+# Shared by every account; per-account headers only overlay user-agent and authorization
+BASE_HEADERS = MappingProxyType({
+    'accept': 'application/json, text/plain, */*',
+    'accept-language': 'en-US,en;q=0.9',
+    'content-type': 'application/json',
+    'origin': 'https://api.pudgy-clash.elympics.ai',
+    'priority': 'u=1, i',
+    'referer': 'https://api.pudgy-clash.elympics.ai/',
+    'sec-ch-ua': '"Microsoft Edge";v="136", "Microsoft Edge WebView2";v="136", "Not.A/Brand";v="99", "Chromium";v="136"',
+    'sec-ch-ua-mobile': '?0',
+    'sec-ch-ua-platform': '"Windows"',
+    'sec-fetch-dest': 'empty',
+    'sec-fetch-mode': 'cors',
+    'sec-fetch-site': 'cross-site',
+})
+
+
+def proxy_host(proxy_str):
+    """Reduce a proxy URL to host:port so results never carry proxy credentials."""
     if not proxy_str:
-        logger.debug("No proxy string provided, returning None")
-        return None
-    try:
-        parsed = urllib.parse.urlparse(proxy_str)
-        if not parsed.scheme or not parsed.hostname or not parsed.port:
-            raise ValueError("Invalid proxy format")
-        proxy_dict = {
-            "scheme": parsed.scheme,
-            "hostname": parsed.hostname,
-            "port": parsed.port,
-            "username": parsed.username or "",
-            "password": parsed.password or ""
-        }
-        logger.debug(f"Parsed proxy: {proxy_dict}")
-        return proxy_dict
-    except Exception as ex:
-        logger.error(f"Failed to parse proxy {proxy_str}: {ex}")
         return None
+    parsed = urllib.parse.urlparse(proxy_str)
+    return f"{parsed.hostname}:{parsed.port}"
+
+
+def extract_init_data(auth_url: str):
+    """The tgWebAppData query string of a web view URL."""
+    return urllib.parse.unquote(auth_url.split('tgWebAppData=')[1].split('&tgWebAppVersion')[0])
+
+
+def parse_init_data(query: str):
+    """Parsed init data fields and the decoded user object."""
+    init_data = urllib.parse.parse_qs(query)
+    return init_data, json.loads(init_data['user'][0])
+
+
+def build_headers(user_agent: str):
+    """Per-account headers: the user agent, and later the token, over the shared BASE_HEADERS."""
+    return ChainMap({'user-agent': user_agent}, BASE_HEADERS)
 
 
 class Pengu:
+    __slots__ = ('thread', 'session_name', 'account', 'useragent', 'proxy', 'headers', 'client', 'session',
+                 'user_id', 'nickname', 'avatar_url', 'timings', 'timed_out')
+
     def __init__(self, thread: int, session_name: str, user_agent: str, proxy: [str, None]):
         self.headers = None
         self.useragent = user_agent
+        self.session_name = session_name
         self.account = session_name + '.session'
         self.thread = thread
-        self.tg_init_data = None
         self.proxy = proxy if proxy else None
+        self.user_id = None
+        self.nickname = None
+        self.avatar_url = None
+        self.timings = {}
+        # Set when a request ran out of its time budget, so the run is recorded as a timeout
+        self.timed_out = False
+        # Telegram client and HTTP session are opened only when their stage starts
+        self.client = None
+        self.session = None
         logger.debug(
             f"Thread {self.thread} | {self.account} | Initializing Pengu with user_agent: {user_agent}, proxy: {proxy}")
-        connector = ProxyConnector.from_url(self.proxy) if proxy else aiohttp.TCPConnector(verify_ssl=False)
-        self.client = Client(
-            name=session_name,
-            api_id=config.API_ID,
-            api_hash=config.API_HASH,
-            workdir=config.WORKDIR,
-            proxy=parse_proxy(proxy),
-            lang_code='en'
-        )
-        self.session = aiohttp.ClientSession(trust_env=True, connector=connector)
+
+    async def open_client(self):
+        await fd_budget.acquire('telegram')
+        try:
+            self.client = Client(
+                name=self.session_name,
+                api_id=config.API_ID,
+                api_hash=config.API_HASH,
+                proxy=parse_proxy(self.proxy),
+                lang_code='en',
+                **session_kwargs(self.session_name)
+            )
+        except BaseException:
+            await fd_budget.release('telegram')
+            raise
+
+    async def close_client(self):
+        if self.client is None:
+            return
+        client, self.client = self.client, None
+        logger.debug(f"Thread {self.thread} | {self.account} | Disconnecting from Telegram")
+        try:
+            await release_client(client)
+        except Exception as e:
+            # Not released: the budget summary reports it as leaked
+            logger.warning(f"Thread {self.thread} | {self.account} | Error disconnecting from Telegram: {e}")
+            return
+        logger.info(f"Thread {self.thread} | {self.account} | Disconnected from Telegram")
+        await fd_budget.release('telegram')
+
+    async def open_session(self):
+        await fd_budget.acquire('http')
+        try:
+            connector = ProxyConnector.from_url(self.proxy) if self.proxy else aiohttp.TCPConnector(verify_ssl=False)
+            timeout = aiohttp.ClientTimeout(total=config.TIMEOUTS['HTTP_REQUEST'],
+                                            sock_connect=config.TIMEOUTS['HTTP_CONNECT'])
+            self.session = aiohttp.ClientSession(trust_env=True, connector=connector, timeout=timeout)
+        except BaseException:
+            await fd_budget.release('http')
+            raise
         logger.debug(f"Thread {self.thread} | {self.account} | HTTP session initialized")
 
-    async def logout(self):
+    async def close_session(self):
+        if self.session is None:
+            return
+        session, self.session = self.session, None
         logger.debug(f"Thread {self.thread} | {self.account} | Attempting to close HTTP session")
         try:
-            await self.session.close()
+            await session.close()
             logger.info(f"Thread {self.thread} | {self.account} | HTTP session closed successfully")
         except Exception as e:
             logger.warning(f"Thread {self.thread} | {self.account} | Error closing HTTP session: {e}")
+        finally:
+            await fd_budget.release('http')
+
+    async def tg_call(self, coro, timeout: float):
+        """Await a Telegram call within its timeout under the adaptive Telegram limit."""
+        try:
+            async with limiters['telegram'].slot():
+                return await asyncio.wait_for(coro, timeout=timeout)
+        finally:
+            # No-op once awaited; avoids a "never awaited" warning when cancelled while queued
+            coro.close()
+
+    @asynccontextmanager
+    async def request(self, method: str, url: str, **kwargs):
+        """HTTP request under the adaptive limit of its host."""
+        async with limiters[urllib.parse.urlparse(url).hostname].slot() as slot:
+            async with self.session.request(method, url, **kwargs) as response:
+                slot.status(response.status)
+                yield response
+
+    async def logout(self):
+        """Release everything still open; safe to call after errors and cancellation."""
+        try:
+            await self.close_client()
+        finally:
+            await self.close_session()
+            self.headers = None
 
     async def login(self):
         logger.debug(f"Thread {self.thread} | {self.account} | Starting login process")
@@ -70,34 +170,23 @@ class Pengu:
         logger.debug(
             f"Thread {self.thread} | {self.account} | Slept for {random.uniform(*config.DELAYS['ACCOUNT']):.2f} seconds")
 
-        query = await self.get_tg_web_data()
+        started = time.monotonic()
+        try:
+            query = await self.get_tg_web_data()
+        except asyncio.TimeoutError:
+            return False, TIMEOUT_ERROR
+        self.timings['telegram'] = time.monotonic() - started
         if query is None:
             logger.error(f"Thread {self.thread} | {self.account} | Failed to get tg_web_data")
             return False, "Failed to get Telegram web data"
         logger.debug(f"Thread {self.thread} | {self.account} | Retrieved tg_web_data: {query}")
 
-        self.tg_init_data = query
-        self.headers = {
-            'accept': 'application/json, text/plain, */*',
-            'accept-language': 'en-US,en;q=0.9',
-            'content-type': 'application/json',
-            'origin': 'https://api.pudgy-clash.elympics.ai',
-            'priority': 'u=1, i',
-            'referer': 'https://api.pudgy-clash.elympics.ai/',
-            'sec-ch-ua': '"Microsoft Edge";v="136", "Microsoft Edge WebView2";v="136", "Not.A/Brand";v="99", "Chromium";v="136"',
-            'sec-ch-ua-mobile': '?0',
-            'sec-ch-ua-platform': '"Windows"',
-            'sec-fetch-dest': 'empty',
-            'sec-fetch-mode': 'cors',
-            'sec-fetch-site': 'cross-site',
-            'user-agent': self.useragent,
-        }
+        self.headers = build_headers(self.useragent)
         logger.debug(f"Thread {self.thread} | {self.account} | Initialized headers: {self.headers}")
 
         # Parse the init data to get required fields
-        init_data = urllib.parse.parse_qs(query)
+        init_data, user_data = parse_init_data(query)
         logger.debug(f"Thread {self.thread} | {self.account} | Parsed init data: {init_data}")
-        user_data = json.loads(init_data['user'][0])
         logger.debug(f"Thread {self.thread} | {self.account} | User data: {user_data}")
 
         # Prepare the login request data
@@ -112,11 +201,13 @@ class Pengu:
         }
         logger.debug(f"Thread {self.thread} | {self.account} | Login request data: {login_data}")
 
+        await self.open_session()
         try:
             logger.debug(
                 f"Thread {self.thread} | {self.account} | Sending login request to https://api.elympics.cc/v2/auth/user/telegram-auth-v2")
-            async with self.session.post(
-                    'https://api.elympics.cc/v2/auth/user/telegram-auth-v2',
+            started = time.monotonic()
+            async with self.request(
+                    'POST', 'https://api.elympics.cc/v2/auth/user/telegram-auth-v2',
                     headers=self.headers,
                     json=login_data,
                     ssl=False
@@ -124,45 +215,56 @@ class Pengu:
                 logger.debug(f"Thread {self.thread} | {self.account} | Login response status: {response.status}")
                 response_text = await response.text()
                 logger.debug(f"Thread {self.thread} | {self.account} | Login response body: {response_text}")
-                if response.status == 200:
-                    response_json = await response.json()
-                    logger.debug(f"Thread {self.thread} | {self.account} | Login response JSON: {response_json}")
-                    if "jwtToken" in response_json:
-                        self.jwt_token = response_json["jwtToken"]
-                        self.user_id = response_json["userId"]
-                        self.nickname = response_json["nickname"]
-                        self.avatar_url = response_json["avatarUrl"]
-                        self.headers["authorization"] = f"Bearer {self.jwt_token}"
-                        logger.info(
-                            f"Thread {self.thread} | {self.account} | JWT token received, user_id: {self.user_id}, nickname: {self.nickname}")
-                        logger.debug(
-                            f"Thread {self.thread} | {self.account} | Updated headers with authorization: {self.headers}")
-
-                        waitlist_status = await self.check_waitlist()
-                        logger.info(f"Thread {self.thread} | {self.account} | Waitlist status: {waitlist_status}")
-                        if waitlist_status == "not-joined":
-                            logger.debug(
-                                f"Thread {self.thread} | {self.account} | Waitlist not joined, proceeding to join")
-                            await self.join_waitlist()
-                            await asyncio.sleep(3)
-                            await self.process_tasks()
-
-                        if waitlist_status == "pending":
-                            logger.debug(
-                                f"Thread {self.thread} | {self.account} | Waitlist pending, proceeding to claim")
-                            await self.claim_waitlist()
-                            await asyncio.sleep(3)
-                            await self.process_tasks()
-
-                        logger.success(f"Thread {self.thread} | {self.account} | Login successful")
-                        return True, {"user_id": self.user_id, "nickname": self.nickname}
-                    else:
-                        logger.error(f"Thread {self.thread} | {self.account} | JWT token not found in response")
-                        return False, "No JWT token in response"
-                else:
-                    logger.error(
-                        f"Thread {self.thread} | {self.account} | Login HTTP error {response.status}: {response_text}")
-                    return False, f"HTTP {response.status}: {response_text}"
+                response_json = await response.json() if response.status == 200 else None
+            # The api.elympics.cc slot is released here; the waitlist requests take their own slots
+
+            if response.status != 200:
+                logger.error(
+                    f"Thread {self.thread} | {self.account} | Login HTTP error {response.status}: {response_text}")
+                return False, f"HTTP {response.status}: {response_text}"
+            logger.debug(f"Thread {self.thread} | {self.account} | Login response JSON: {response_json}")
+            if "jwtToken" not in response_json:
+                logger.error(f"Thread {self.thread} | {self.account} | JWT token not found in response")
+                return False, "No JWT token in response"
+
+            self.user_id = response_json["userId"]
+            self.nickname = response_json["nickname"]
+            self.avatar_url = response_json["avatarUrl"]
+            self.headers["authorization"] = f"Bearer {response_json['jwtToken']}"
+            self.timings['auth'] = time.monotonic() - started
+            logger.info(
+                f"Thread {self.thread} | {self.account} | JWT token received, user_id: {self.user_id}, nickname: {self.nickname}")
+            logger.debug(
+                f"Thread {self.thread} | {self.account} | Updated headers with authorization: {self.headers}")
+
+            started = time.monotonic()
+            waitlist_status = await self.check_waitlist()
+            logger.info(f"Thread {self.thread} | {self.account} | Waitlist status: {waitlist_status}")
+            if waitlist_status == "not-joined":
+                logger.debug(
+                    f"Thread {self.thread} | {self.account} | Waitlist not joined, proceeding to join")
+                await self.join_waitlist()
+                await asyncio.sleep(3)
+                await self.process_tasks()
+
+            if waitlist_status == "pending":
+                logger.debug(
+                    f"Thread {self.thread} | {self.account} | Waitlist pending, proceeding to claim")
+                await self.claim_waitlist()
+                await asyncio.sleep(3)
+                await self.process_tasks()
+
+            if waitlist_status not in ("not-joined", "pending", "unknown"):
+                logger.debug(
+                    f"Thread {self.thread} | {self.account} | Waitlist {waitlist_status}, checking tasks")
+                await self.process_tasks()
+            self.timings['waitlist'] = time.monotonic() - started
+
+            logger.success(f"Thread {self.thread} | {self.account} | Login successful")
+            return True, {"user_id": self.user_id, "nickname": self.nickname}
+        except asyncio.TimeoutError:
+            logger.error(f"Thread {self.thread} | {self.account} | Login request timed out")
+            return False, TIMEOUT_ERROR
         except Exception as e:
             logger.error(f"Thread {self.thread} | {self.account} | Login error: {e}")
             return False, str(e)
@@ -172,8 +274,8 @@ class Pengu:
         try:
             logger.debug(
                 f"Thread {self.thread} | {self.account} | Sending GET request to https://api.pudgy-clash.elympics.ai/api/waitlist with headers: {self.headers}")
-            async with self.session.get(
-                    'https://api.pudgy-clash.elympics.ai/api/waitlist',
+            async with self.request(
+                    'GET', 'https://api.pudgy-clash.elympics.ai/api/waitlist',
                     headers=self.headers,
                     ssl=False
             ) as response:
@@ -192,6 +294,10 @@ class Pengu:
                 logger.error(
                     f"Thread {self.thread} | {self.account} | Waitlist check HTTP error {response.status}: {response_text}")
                 return "unknown"
+        except asyncio.TimeoutError:
+            logger.error(f"Thread {self.thread} | {self.account} | Waitlist check timed out")
+            self.timed_out = True
+            return "unknown"
         except Exception as e:
             logger.error(f"Thread {self.thread} | {self.account} | Waitlist check error: {e}")
             return "unknown"
@@ -210,8 +316,8 @@ class Pengu:
         try:
             logger.debug(
                 f"Thread {self.thread} | {self.account} | Sending POST request to https://api.pudgy-clash.elympics.ai/api/waitlist/join with headers: {self.headers}")
-            async with self.session.post(
-                    'https://api.pudgy-clash.elympics.ai/api/waitlist/join',
+            async with self.request(
+                    'POST', 'https://api.pudgy-clash.elympics.ai/api/waitlist/join',
                     headers=self.headers,
                     json=join_data,
                     ssl=False
@@ -226,6 +332,9 @@ class Pengu:
                 else:
                     logger.error(
                         f"Thread {self.thread} | {self.account} | Failed to join waitlist: HTTP {response.status}: {response_text}")
+        except asyncio.TimeoutError:
+            logger.error(f"Thread {self.thread} | {self.account} | Join waitlist timed out")
+            self.timed_out = True
         except Exception as e:
             logger.error(f"Thread {self.thread} | {self.account} | Join waitlist error: {e}")
 
@@ -234,8 +343,8 @@ class Pengu:
         try:
             logger.debug(
                 f"Thread {self.thread} | {self.account} | Sending POST request to https://api.pudgy-clash.elympics.ai/api/waitlist/claim with headers: {self.headers}")
-            async with self.session.post(
-                    'https://api.pudgy-clash.elympics.ai/api/waitlist/claim',
+            async with self.request(
+                    'POST', 'https://api.pudgy-clash.elympics.ai/api/waitlist/claim',
                     headers=self.headers,
                     json={"isBot": False},
                     ssl=False
@@ -250,6 +359,9 @@ class Pengu:
                 else:
                     logger.error(
                         f"Thread {self.thread} | {self.account} | Failed to claim waitlist: HTTP {response.status}: {response_text}")
+        except asyncio.TimeoutError:
+            logger.error(f"Thread {self.thread} | {self.account} | Claim waitlist timed out")
+            self.timed_out = True
         except Exception as e:
             logger.error(f"Thread {self.thread} | {self.account} | Claim waitlist error: {e}")
 
@@ -261,8 +373,8 @@ class Pengu:
             try:
                 logger.debug(
                     f"Thread {self.thread} | {self.account} | Sending POST request to https://api.pudgy-clash.elympics.ai/api/waitlist/complete/twitter with headers: {self.headers}")
-                async with self.session.post(
-                        'https://api.pudgy-clash.elympics.ai/api/waitlist/complete/twitter',
+                async with self.request(
+                        'POST', 'https://api.pudgy-clash.elympics.ai/api/waitlist/complete/twitter',
                         headers=self.headers,
                         json={"isBot": False},
                         ssl=False
@@ -279,14 +391,15 @@ class Pengu:
                     else:
                         logger.error(
                             f"Thread {self.thread} | {self.account} | Failed to complete Twitter task: HTTP {response.status}: {response_text}")
-                        if response.status == 400 and attempt < retries - 1:
-                            logger.info(
-                                f"Thread {self.thread} | {self.account} | Retrying Twitter task in {delay} seconds...")
-                            await asyncio.sleep(delay)
-                        else:
+                        if response.status != 400 or attempt == retries - 1:
                             return False
+                # Wait for the retry outside the request, so the host slot is free meanwhile
+                logger.info(f"Thread {self.thread} | {self.account} | Retrying Twitter task in {delay} seconds...")
+                await asyncio.sleep(delay)
             except Exception as e:
                 logger.error(f"Thread {self.thread} | {self.account} | Complete Twitter task error: {e}")
+                if isinstance(e, asyncio.TimeoutError) and attempt == retries - 1:
+                    self.timed_out = True
                 if attempt < retries - 1:
                     logger.info(f"Thread {self.thread} | {self.account} | Retrying Twitter task in {delay} seconds...")
                     await asyncio.sleep(delay)
@@ -301,8 +414,8 @@ class Pengu:
         for attempt in range(retries):
             logger.info(f"Thread {self.thread} | {self.account} | Telegram task attempt {attempt + 1}/{retries}")
             try:
-                async with self.session.post(
-                        'https://api.pudgy-clash.elympics.ai/api/waitlist/complete/telegram',
+                async with self.request(
+                        'POST', 'https://api.pudgy-clash.elympics.ai/api/waitlist/complete/telegram',
                         headers=self.headers,
                         json={"isBot": False},
                         ssl=False
@@ -319,14 +432,15 @@ class Pengu:
                     else:
                         logger.error(
                             f"Thread {self.thread} | {self.account} | Failed to complete Telegram task: HTTP {response.status}: {response_text}")
-                        if response.status == 400 and attempt < retries - 1:
-                            logger.info(
-                                f"Thread {self.thread} | {self.account} | Retrying Telegram task in {delay} seconds...")
-                            await asyncio.sleep(delay)
-                        else:
+                        if response.status != 400 or attempt == retries - 1:
                             return False
+                # Wait for the retry outside the request, so the host slot is free meanwhile
+                logger.info(f"Thread {self.thread} | {self.account} | Retrying Telegram task in {delay} seconds...")
+                await asyncio.sleep(delay)
             except Exception as e:
                 logger.error(f"Thread {self.thread} | {self.account} | Complete Telegram task error: {e}")
+                if isinstance(e, asyncio.TimeoutError) and attempt == retries - 1:
+                    self.timed_out = True
                 if attempt < retries - 1:
                     logger.info(f"Thread {self.thread} | {self.account} | Retrying Telegram task in {delay} seconds...")
                     await asyncio.sleep(delay)
@@ -353,7 +467,7 @@ class Pengu:
             logger.info(
                 f"Thread {self.thread} | {self.account} | Task {task_type} status: {'completed' if is_completed else 'todo'}")
 
-            if not is_completed:
+            if not is_completed and task_type in COMPLETABLE_TASKS:
                 if task_type == "followTwitter":
                     logger.info(
                         f"Thread {self.thread} | {self.account} | Twitter task is in 'todo' state, attempting to complete...")
@@ -370,8 +484,8 @@ class Pengu:
     async def get_waitlist_data(self):
         logger.debug(f"Thread {self.thread} | {self.account} | Retrieving waitlist data")
         try:
-            async with self.session.get(
-                    'https://api.pudgy-clash.elympics.ai/api/waitlist',
+            async with self.request(
+                    'GET', 'https://api.pudgy-clash.elympics.ai/api/waitlist',
                     headers=self.headers,
                     ssl=False
             ) as response:
@@ -388,13 +502,21 @@ class Pengu:
                     logger.debug(f"Thread {self.thread} | {self.account} | Waitlist data JSON: {response_json}")
 
                     # Prepare account data to save
+                    tasks = response_json.get("tasks")
                     account_data = {
                         "account": self.account,
+                        "proxy": proxy_host(self.proxy),
+                        "timestamp": int(time.time()),
                         "user_id": self.user_id,
                         "nickname": self.nickname,
                         "invite_code": invite_code,
                         "waitlist_status": response_json.get("status", "unknown"),
-                        "reward": response_json.get("reward", "unknown")
+                        "reward": response_json.get("reward", "unknown"),
+                        # None when the response lists no tasks, so the planner keeps the account; only
+                        # task types the bot can complete count, the others would keep it forever
+                        "tasks_completed": (all("completed" in task.get("progress", {}) for task in tasks
+                                                if task.get("type") in COMPLETABLE_TASKS)
+                                            if tasks else None)
                     }
                     logger.debug(f"Thread {self.thread} | {self.account} | Account data to save: {account_data}")
 
@@ -439,48 +561,53 @@ class Pengu:
                     logger.error(
                         f"Thread {self.thread} | {self.account} | Failed to retrieve waitlist data: HTTP {response.status}: {response_text}")
                     return None
+        except asyncio.TimeoutError:
+            logger.error(f"Thread {self.thread} | {self.account} | Get waitlist data timed out")
+            self.timed_out = True
+            return None
         except Exception as e:
             logger.error(f"Thread {self.thread} | {self.account} | Get waitlist data error: {e}")
             return None
 
     async def get_tg_web_data(self):
         logger.debug(f"Thread {self.thread} | {self.account} | Retrieving Telegram web data")
+        await self.open_client()
         try:
             logger.debug(
-                f"Thread {self.thread} | {self.account} | Connecting to Telegram with timeout {config.TIMEOUT}s")
-            connected = await asyncio.wait_for(self.client.connect(), timeout=config.TIMEOUT)
+                f"Thread {self.thread} | {self.account} | Connecting to Telegram with timeout {config.TIMEOUTS['TELEGRAM_CONNECT']}s")
+            connected = await self.tg_call(self.client.connect(), timeout=config.TIMEOUTS['TELEGRAM_CONNECT'])
             if not connected:
                 logger.error(f"Thread {self.thread} | {self.account} | Failed to connect to Telegram")
                 return None
 
-            try:
-                logger.debug(
-                    f"Thread {self.thread} | {self.account} | Sending /start command with invite-{config.REF_LINK}")
-                await self.client.send_message("pengu_clash_bot", f'/start invite-{config.REF_LINK}')
-                peer = await self.client.resolve_peer('pengu_clash_bot')
-                logger.debug(f"Thread {self.thread} | {self.account} | Resolved peer for pengu_clash_bot: {peer}")
-                await asyncio.sleep(3)
-                logger.debug(f"Thread {self.thread} | {self.account} | Slept for 3 seconds before requesting web view")
-                web_view = await self.client.invoke(RequestWebView(
-                    peer=peer,
-                    bot=peer,
-                    platform='android',
-                    from_bot_menu=False,
-                    start_param=f"invite-{config.REF_LINK}",
-                    url='https://api.pudgy-clash.elympics.ai'
-                ))
-                auth_url = web_view.url
-                logger.debug(f"Thread {self.thread} | {self.account} | Web view auth URL: {auth_url}")
-                query = urllib.parse.unquote(auth_url.split('tgWebAppData=')[1].split('&tgWebAppVersion')[0])
-                logger.debug(f"Thread {self.thread} | {self.account} | Got tg_web_data: {query}")
-                return query
-            finally:
-                logger.debug(f"Thread {self.thread} | {self.account} | Disconnecting from Telegram")
-                await self.client.disconnect()
-                logger.info(f"Thread {self.thread} | {self.account} | Disconnected from Telegram")
+            logger.debug(
+                f"Thread {self.thread} | {self.account} | Sending /start command with invite-{config.REF_LINK}")
+            request_timeout = config.TIMEOUTS['TELEGRAM_REQUEST']
+            await self.tg_call(
+                self.client.send_message("pengu_clash_bot", f'/start invite-{config.REF_LINK}'),
+                timeout=request_timeout)
+            peer = await self.tg_call(self.client.resolve_peer('pengu_clash_bot'), timeout=request_timeout)
+            logger.debug(f"Thread {self.thread} | {self.account} | Resolved peer for pengu_clash_bot: {peer}")
+            await asyncio.sleep(3)
+            logger.debug(f"Thread {self.thread} | {self.account} | Slept for 3 seconds before requesting web view")
+            web_view = await self.tg_call(self.client.invoke(RequestWebView(
+                peer=peer,
+                bot=peer,
+                platform='android',
+                from_bot_menu=False,
+                start_param=f"invite-{config.REF_LINK}",
+                url='https://api.pudgy-clash.elympics.ai'
+            )), timeout=request_timeout)
+            auth_url = web_view.url
+            logger.debug(f"Thread {self.thread} | {self.account} | Web view auth URL: {auth_url}")
+            query = extract_init_data(auth_url)
+            logger.debug(f"Thread {self.thread} | {self.account} | Got tg_web_data: {query}")
+            return query
         except asyncio.TimeoutError:
-            logger.error(f"Thread {self.thread} | {self.account} | Timeout connecting to Telegram")
-            return None
+            logger.error(f"Thread {self.thread} | {self.account} | Telegram stage timed out")
+            raise
         except Exception as e:
             logger.error(f"Thread {self.thread} | {self.account} | Error in get_tg_web_data: {e}")
             return None
+        finally:
+            await self.close_client()
@@ -0,0 +1,57 @@
+import json
+import os
+from utils.core import logger
+
+RESULTS_FILE = "output/accounts_data.json"
+
+# Lower runs first; accounts without a record are treated like not-joined ones
+PRIORITY = {
+    "pending": 0,
+    "not-joined": 1,
+    None: 1,
+    "unknown": 1,
+}
+INCOMPLETE_TASKS = 2
+
+
+def load_last_states(path: str = RESULTS_FILE):
+    """Return the last recorded result of every account, keyed by '<session_name>.session'."""
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, encoding='utf-8') as file:
+            records = json.load(file)
+    except (json.JSONDecodeError, OSError) as e:
+        logger.warning(f"Failed to read {path}, planning all accounts: {e}")
+        return {}
+
+    if not isinstance(records, list):
+        records = [records]
+    return {record.get("account"): record for record in records if isinstance(record, dict)}
+
+
+def account_priority(state: [dict, None]):
+    """Priority of an account, or None when its last state is final and all completable tasks are done."""
+    status = state.get("waitlist_status") if state else None
+    if status in PRIORITY:
+        return PRIORITY[status]
+    if not state.get("tasks_completed", False):
+        return INCOMPLETE_TASKS
+    return None
+
+
+def plan_accounts(accounts: list, path: str = RESULTS_FILE):
+    """Drop accounts with nothing to do and order the rest: pending claims, not-joined, incomplete tasks."""
+    states = load_last_states(path)
+    planned = []
+    skipped = 0
+    for index, account in enumerate(accounts):
+        priority = account_priority(states.get(f"{account['session_name']}.session"))
+        if priority is None:
+            skipped += 1
+            continue
+        planned.append((priority, index, account))
+
+    planned.sort(key=lambda item: item[:2])
+    logger.info(f"Planned {len(planned)} account(s), skipped {skipped} with nothing to do")
+    return [account for _, _, account in planned]
@@ -0,0 +1,152 @@
+import asyncio
+import cProfile
+import io
+import logging
+import os
+import pstats
+import time
+import weakref
+from data import config
+from utils.core import logger
+
+PROFILE_DIR = "logs/profile"
+
+# Functions from these modules are listed separately in the report
+HOT_PATHS = r"pengu|telegram|starter|logger"
+
+# Slowest tasks (one per account) listed with their own hot functions in the yappi report
+SLOW_TASKS = 20
+
+
+class LoguruHandler(logging.Handler):
+    """Forward asyncio debug messages (slow callbacks, never-retrieved exceptions) to loguru."""
+
+    def emit(self, record):
+        logger.opt(depth=6, exception=record.exc_info).log(record.levelname, record.getMessage())
+
+
+class Profiler:
+    def __init__(self):
+        self.started = time.strftime("%Y%m%d_%H%M%S")
+        self.lags = []
+        self.lag_task = None
+        self.yappi = None
+        self.profile = None
+        # yappi tag -> [task name, started, finished]; tag 0 is code running outside any task
+        self.tasks = []
+        self.task_tags = weakref.WeakKeyDictionary()
+
+    def start(self, loop: asyncio.AbstractEventLoop):
+        """Enable asyncio debug mode, the CPU profiler and loop-lag sampling."""
+        loop.set_debug(True)
+        loop.slow_callback_duration = config.PROFILE['SLOW_CALLBACK']
+        logging.getLogger("asyncio").addHandler(LoguruHandler())
+        logging.getLogger("asyncio").setLevel(logging.WARNING)
+
+        try:
+            import yappi
+            yappi.set_clock_type("wall")
+            yappi.set_tag_callback(self.task_tag)
+            yappi.start()
+            self.yappi = yappi
+            logger.info("Profiling with yappi (wall clock, per task)")
+        except ImportError:
+            self.profile = cProfile.Profile()
+            self.profile.enable()
+            logger.info("Profiling with cProfile (install yappi for the per-task report)")
+
+        self.lag_task = loop.create_task(self.sample_lag())
+
+    def task_tag(self):
+        """yappi tag of the running asyncio task, so stats can be split per account."""
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:
+            return 0
+        if task is None:
+            return 0
+        tag = self.task_tags.get(task)
+        if tag is None:
+            entry = [task.get_name(), time.perf_counter(), None]
+            self.tasks.append(entry)
+            tag = self.task_tags[task] = len(self.tasks)
+            task.add_done_callback(lambda _: entry.__setitem__(2, time.perf_counter()))
+        return tag
+
+    async def sample_lag(self):
+        """Measure how late the loop wakes up; blocking calls show up as large lags."""
+        interval = config.PROFILE['LAG_INTERVAL']
+        while True:
+            expected = time.perf_counter() + interval
+            await asyncio.sleep(interval)
+            lag = time.perf_counter() - expected
+            self.lags.append(lag)
+            if lag > config.PROFILE['LAG_WARNING']:
+                logger.warning(f"Event loop lag {lag * 1000:.0f} ms")
+
+    def stop(self, loop: asyncio.AbstractEventLoop):
+        """Stop sampling and write the reports to PROFILE_DIR."""
+        if self.lag_task is not None:
+            self.lag_task.cancel()
+            try:
+                loop.run_until_complete(self.lag_task)
+            except asyncio.CancelledError:
+                pass
+
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        prefix = os.path.join(PROFILE_DIR, self.started)
+
+        if self.yappi is not None:
+            self.yappi.stop()
+            func_stats = self.yappi.get_func_stats()
+            func_stats.save(f"{prefix}.prof", type="pstat")
+            stats = pstats.Stats(f"{prefix}.prof")
+        else:
+            self.profile.disable()
+            self.profile.dump_stats(f"{prefix}.prof")
+            stats = pstats.Stats(self.profile)
+
+        with open(f"{prefix}.txt", "w", encoding="utf-8") as file:
+            file.write(self.format_stats(stats, HOT_PATHS))
+            file.write(self.format_stats(stats))
+            if self.yappi is not None:
+                file.write(self.format_tasks())
+            file.write(self.format_lags())
+        logger.success(f"Profile written to {prefix}.txt and {prefix}.prof")
+
+    @staticmethod
+    def format_stats(stats: pstats.Stats, restriction: str = None):
+        stream = io.StringIO()
+        stats.stream = stream
+        stats.sort_stats("cumulative")
+        if restriction:
+            stream.write(f"=== Hot paths ({restriction}) ===\n")
+            stats.print_stats(restriction, 50)
+        else:
+            stream.write("=== All functions ===\n")
+            stats.print_stats(50)
+        return stream.getvalue()
+
+    def format_tasks(self):
+        """Slowest tasks by wall time, each with the functions it spent most of its own time in."""
+        now = time.perf_counter()
+        slowest = sorted(((finished or now) - started, tag, name)
+                         for tag, (name, started, finished) in enumerate(self.tasks, 1))[::-1]
+        lines = [f"=== Slowest tasks ({len(self.tasks)} profiled) ==="]
+        for wall, tag, name in slowest[:SLOW_TASKS]:
+            lines.append(f"{name}: {wall:.2f} s")
+            # Filtering by tag per task; only done for the few listed tasks
+            stats = self.yappi.get_func_stats(filter={"tag": tag})
+            stats.sort("tsub")
+            for stat in list(stats)[:5]:
+                lines.append(f"    {stat.tsub * 1000:>9.1f} ms own, {stat.ncall:>6} calls  "
+                             f"{stat.name} ({os.path.basename(stat.module)}:{stat.lineno})")
+        return "\n".join(lines) + "\n"
+
+    def format_lags(self):
+        if not self.lags:
+            return "=== Loop lag ===\nno samples\n"
+        lags = sorted(self.lags)
+        p95 = lags[min(len(lags) - 1, int(len(lags) * 0.95))]
+        return (f"=== Loop lag ===\nsamples: {len(lags)}, mean: {sum(lags) / len(lags) * 1000:.1f} ms, "
+                f"p95: {p95 * 1000:.1f} ms, max: {lags[-1] * 1000:.1f} ms\n")
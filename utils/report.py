@@ -0,0 +1,138 @@
+import json
+import os
+import pandas as pd
+from utils.core import logger
+
+OUTPUT_DIR = "output"
+ACCOUNTS_FILE = os.path.join(OUTPUT_DIR, "accounts_data.json")
+RUNS_FILE = os.path.join(OUTPUT_DIR, "runs.csv")
+REPORT_DIR = os.path.join(OUTPUT_DIR, "report")
+
+TIMING_COLUMNS = ["telegram_s", "auth_s", "waitlist_s", "total_s"]
+
+
+def columnar_format():
+    """Pick the best columnar format available: parquet/feather need pyarrow, csv always works."""
+    try:
+        import pyarrow  # noqa: F401
+        return "parquet"
+    except ImportError:
+        return "csv"
+
+
+def load_frame(path: str):
+    """Load results from json, parquet, feather or csv into a DataFrame."""
+    if not os.path.exists(path):
+        return pd.DataFrame()
+
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".parquet":
+        return pd.read_parquet(path)
+    if ext == ".feather":
+        return pd.read_feather(path)
+    if ext == ".csv":
+        return pd.read_csv(path)
+    # json.load + from_records is several times faster than pd.read_json on large record arrays
+    with open(path, encoding='utf-8') as file:
+        return pd.DataFrame.from_records(json.load(file))
+
+
+def export_path(name: str):
+    return os.path.join(REPORT_DIR, f"{name}.{columnar_format()}")
+
+
+def load_cached(path: str, name: str):
+    """Load results, preferring the columnar export when it is newer than the source file.
+
+    Returns the frame and whether it came from the source (and so should be exported again).
+    """
+    cached = export_path(name)
+    if os.path.exists(cached) and (not os.path.exists(path) or os.path.getmtime(cached) >= os.path.getmtime(path)):
+        return load_frame(cached), False
+    return load_frame(path), True
+
+
+def export_frame(df: pd.DataFrame, name: str):
+    """Write a DataFrame to the report folder in a columnar format and return the path."""
+    os.makedirs(REPORT_DIR, exist_ok=True)
+    path = export_path(name)
+    if path.endswith(".parquet"):
+        df.to_parquet(path, index=False)
+    else:
+        df.to_csv(path, index=False)
+    return path
+
+
+def latest_per_account(accounts: pd.DataFrame):
+    """Keep only the last recorded row of every account, with rewards as numbers."""
+    if accounts.empty or "account" not in accounts:
+        return accounts
+    accounts = accounts.drop_duplicates(subset="account", keep="last")
+    if "reward" in accounts:
+        # "unknown" rewards become NaN so the column has one type for parquet
+        accounts = accounts.assign(reward=pd.to_numeric(accounts["reward"], errors="coerce"))
+    return accounts
+
+
+def status_counts(accounts: pd.DataFrame):
+    if accounts.empty or "waitlist_status" not in accounts:
+        return pd.Series(dtype="int64")
+    return accounts["waitlist_status"].value_counts()
+
+
+def reward_total(accounts: pd.DataFrame):
+    if accounts.empty or "reward" not in accounts:
+        return 0.0
+    return float(pd.to_numeric(accounts["reward"], errors="coerce").sum())
+
+
+def invite_coverage(accounts: pd.DataFrame):
+    """Share of accounts that have a real invite code."""
+    if accounts.empty or "invite_code" not in accounts:
+        return 0.0
+    codes = accounts["invite_code"]
+    return float((codes.notna() & (codes != "unknown")).mean())
+
+
+def proxy_failure_rates(runs: pd.DataFrame):
+    if runs.empty or "status" not in runs or "proxy" not in runs:
+        return pd.DataFrame(columns=["runs", "failure_rate"])
+    failed = runs["status"].ne("success")
+    grouped = failed.groupby(runs["proxy"].fillna("direct"))
+    return pd.DataFrame({"runs": grouped.size(), "failure_rate": grouped.mean()}).sort_values(
+        "failure_rate", ascending=False)
+
+
+def stage_timings(runs: pd.DataFrame):
+    columns = [column for column in TIMING_COLUMNS if column in runs]
+    if runs.empty or not columns:
+        return pd.DataFrame()
+    return runs[columns].apply(pd.to_numeric, errors="coerce").describe(percentiles=[.5, .95, .99]).T
+
+
+def build_report(accounts_path: str = ACCOUNTS_FILE, runs_path: str = RUNS_FILE):
+    """Summarize stored results and export them as columnar files for further analysis."""
+    accounts, accounts_changed = load_cached(accounts_path, "accounts")
+    accounts = latest_per_account(accounts)
+    runs, runs_changed = load_cached(runs_path, "runs")
+    logger.info(f"Loaded {len(accounts)} account(s) and {len(runs)} run(s)")
+
+    report = {
+        "status_counts": status_counts(accounts),
+        "reward_total": reward_total(accounts),
+        "invite_coverage": invite_coverage(accounts),
+        "proxy_failure_rates": proxy_failure_rates(runs),
+        "stage_timings": stage_timings(runs),
+    }
+
+    logger.info(f"Waitlist statuses:\n{report['status_counts'].to_string()}")
+    logger.info(f"Reward total: {report['reward_total']}")
+    logger.info(f"Invite code coverage: {report['invite_coverage']:.1%}")
+    logger.info(f"Failure rate by proxy:\n{report['proxy_failure_rates'].to_string()}")
+    logger.info(f"Stage timings (s):\n{report['stage_timings'].to_string()}")
+
+    if accounts_changed and not accounts.empty:
+        logger.success(f"Exported accounts to {export_frame(accounts, 'accounts')}")
+    if runs_changed and not runs.empty:
+        logger.success(f"Exported runs to {export_frame(runs, 'runs')}")
+    return report
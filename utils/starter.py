@@ -1,37 +1,78 @@
 import asyncio
-from utils.pengu import Pengu
-from utils.core import logger
+import time
+from utils.pengu import Pengu, proxy_host, TIMEOUT_ERROR
+from utils.core import logger, append_to_csv, admission
+from data import config
+
+RUNS_FILE = "output/runs.csv"
+
+
+def record_run(account: str, proxy: [str, None], status: str, error: [str, None], started: float, timings: dict):
+    """Append one row per account run so reports can compute failure rates and stage timings."""
+    try:
+        append_to_csv(RUNS_FILE, {
+            "account": account,
+            "proxy": proxy_host(proxy),
+            "status": status,
+            "error": error,
+            "timestamp": int(time.time()),
+            "telegram_s": timings.get('telegram'),
+            "auth_s": timings.get('auth'),
+            "waitlist_s": timings.get('waitlist'),
+            "total_s": time.monotonic() - started,
+        })
+    except Exception as e:
+        logger.warning(f"{account} | Failed to record run: {e}")
+
+
+async def run_account(pengu: Pengu, thread: int, account: str):
+    """Log in and handle the waitlist; returns (status, error) for the run record."""
+    login_result = await pengu.login()
+    if login_result is None:
+        logger.error(f"Thread {thread} | {account} | Login failed: No result returned")
+        return "failed", "No result returned"
+
+    status, data = login_result
+    if not status:
+        logger.error(f"Thread {thread} | {account} | Login failed: {data or 'Unknown error'}")
+        return ("timeout" if data == TIMEOUT_ERROR else "failed"), data or 'Unknown error'
+
+    logger.success(f"Thread {thread} | {account} | Login successful")
+    try:
+        waitlist_status = await pengu.check_waitlist()
+        if waitlist_status == "pending":
+            await pengu.claim_waitlist()
+    except Exception as e:
+        logger.error(f"Thread {thread} | {account} | Waitlist error: {e}")
+        await asyncio.sleep(5)
+        return "failed", str(e)
+    if pengu.timed_out:
+        return "timeout", TIMEOUT_ERROR
+    return "success", None
 
 
 async def start(thread: int, session_name: str, user_agent: str, proxy: [str, None]):
     """Start a thread for a Pengu account, handling login and waitlist checks."""
     pengu = Pengu(session_name=session_name, user_agent=user_agent, thread=thread, proxy=proxy)
     account = f"{session_name}.session"
+    status, error = "failed", None
 
-    try:
-        login_result = await pengu.login()
-        if login_result is None:
-            logger.error(f"Thread {thread} | {account} | Login failed: No result returned")
-            return
-
-        status, data = login_result
-        if status:
-            logger.success(f"Thread {thread} | {account} | Login successful")
-            try:
-                waitlist_status = await pengu.check_waitlist()
-                if waitlist_status == "pending":
-                    await pengu.claim_waitlist()
-            except Exception as e:
-                logger.error(f"Thread {thread} | {account} | Waitlist error: {e}")
-                await asyncio.sleep(5)
-        else:
-            logger.error(f"Thread {thread} | {account} | Login failed: {data or 'Unknown error'}")
-
-    except Exception as e:
-        logger.error(f"Thread {thread} | {account} | Login error: {e}")
-    finally:
+    # The deadline starts once the account is admitted, so waiting for a turn is not counted as a timeout
+    async with admission():
+        started = time.monotonic()
         try:
-            await pengu.logout()
-            logger.debug(f"Thread {thread} | {account} | Logged out")
+            status, error = await asyncio.wait_for(run_account(pengu, thread, account),
+                                                   timeout=config.TIMEOUTS['ACCOUNT'])
+        except asyncio.TimeoutError:
+            logger.error(f"Thread {thread} | {account} | Account deadline of {config.TIMEOUTS['ACCOUNT']}s exceeded")
+            status, error = "timeout", TIMEOUT_ERROR
         except Exception as e:
-            logger.warning(f"Thread {thread} | {account} | Logout error: {e}")
+            logger.error(f"Thread {thread} | {account} | Login error: {e}")
+            status, error = "error", str(e)
+        finally:
+            try:
+                await pengu.logout()
+                logger.debug(f"Thread {thread} | {account} | Logged out")
+            except Exception as e:
+                logger.warning(f"Thread {thread} | {account} | Logout error: {e}")
+            record_run(account, proxy, status, error, started, pengu.timings)